@@ -1,7 +1,14 @@
 import os, sys
 import time
 import json
+import math
+import struct
+import hashlib
+import heapq
 import threading
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pygame
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -12,6 +19,12 @@ pygame.mixer.init()
 
 AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac', '.m4a')
 CONFIG_FILE = "music_player_config.json"
+HISTORY_FILE = "play_history.log"
+HISTORY_STATS_FILE = "play_history_stats.json"
+PLAYLIST_VIEWS = ("All songs", "Most played", "Recently played")
+SESSION_SAVE_DELAY_MS = 1500        # quiet period before an autosave
+CROSSFADE_APPLY_DELAY_MS = 300      # slider must rest this long before re-decoding
+SESSION_CHECKPOINT_SECONDS = 15     # position checkpoint while playing
 
 def resource_path(relative):
     if hasattr(sys, "_MEIPASS"):
@@ -19,6 +32,1061 @@ def resource_path(relative):
     return os.path.join(relative)
 
 
+def atomic_write_json(path, data, **dump_kwargs):
+    """Write JSON to path via a temp file and rename, so readers never see half a file"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ---------- Crossfade engine ----------
+
+MAX_CROSSFADE_SECONDS = 12
+CROSSFADE_RAMP_STEP = 0.02   # seconds between volume updates
+
+
+class Crossfader:
+    """Crossfade between tracks using two mixer channels.
+
+    While a track plays, a worker decodes the last `seconds` of it and the
+    first `seconds` of the next track. Only those two windows are kept, so
+    memory is bounded by the overlap, not by track length. At the transition
+    the music stream is stopped, both windows play on their own Channel with
+    equal-power volume ramps, and the next track is handed back to
+    pygame.mixer.music at the end of the overlap.
+
+    Stream operations (stop, load, play) go through `submit(fn, on_done)`,
+    which the player routes to its audio worker so they never race with
+    user commands; only the volume ramps run on the timing thread.
+    """
+
+    def __init__(self, seconds=0, volume_getter=None, on_start=None, on_complete=None,
+                 sound_source=None, stop_output=None, submit=None):
+        self.seconds = seconds
+        self.volume_getter = volume_getter or (lambda: 1.0)
+        self.sound_source = sound_source or pygame.mixer.Sound
+        self.stop_output = stop_output or pygame.mixer.music.stop
+        self.submit = submit or self._run_inline
+        self.on_start = on_start
+        self.on_complete = on_complete
+
+        self.active = False
+        self.armed = False
+        self.stats = {}     # name -> [count, total, max], over all transitions
+
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._wake = threading.Event()      # set by cancel() and finish_now()
+        self._handoff = None
+        self._prepared = None
+        self._prepare_key = None
+        self._tail_channel = None
+        self._head_channel = None
+
+        self._decode_cond = threading.Condition()
+        self._decode_job = None
+        self._decode_thread = None
+
+    @property
+    def enabled(self):
+        return self.seconds > 0
+
+    @staticmethod
+    def _run_inline(fn, on_done=None):
+        error = None
+        try:
+            fn()
+        except Exception as e:
+            error = e
+        if on_done:
+            on_done(error)
+
+    def _record_stat(self, name, value):
+        with self._lock:
+            entry = self.stats.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += value
+            entry[2] = max(entry[2], value)
+
+    def stats_summary(self):
+        """Mean/max of each timing and CPU figure, e.g. for printing on exit"""
+        with self._lock:
+            items = sorted(self.stats.items())
+        return ", ".join(f"{name} avg={total / count:.1f} max={peak:.1f} (n={count})"
+                         for name, (count, total, peak) in items)
+
+    def set_seconds(self, seconds):
+        seconds = max(0, min(MAX_CROSSFADE_SECONDS, int(seconds)))
+        if seconds != self.seconds:
+            self.cancel()
+            self.seconds = seconds
+
+    # ----- Decoding -----
+
+    def prepare(self, current_song, next_index, next_song):
+        """Queue decoding of the overlap windows for the upcoming transition.
+
+        A single decode thread serves all requests and only the newest
+        pending job is kept, so repeated calls never stack up full decodes.
+        """
+        self.cancel()
+        if not self.enabled or next_song is None:
+            return
+
+        key = (current_song["path"], next_song["path"], self.seconds)
+        with self._decode_cond:
+            self._prepare_key = key
+            self._decode_job = (key, current_song, next_index, next_song, self.seconds)
+            if self._decode_thread is None:
+                self._decode_thread = threading.Thread(target=self._decode_loop, daemon=True)
+                self._decode_thread.start()
+            self._decode_cond.notify()
+
+    def _decode_loop(self):
+        while True:
+            with self._decode_cond:
+                while self._decode_job is None:
+                    self._decode_cond.wait()
+                job, self._decode_job = self._decode_job, None
+            self._decode_job_run(*job)
+
+    def _decode_job_run(self, key, current_song, next_index, next_song, seconds):
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        try:
+            if self._prepare_key != key:
+                return
+            tail, tail_length = self._decode_window(current_song["path"], seconds, from_end=True)
+            # Superseded while the tail was decoding: skip the second decode
+            if self._prepare_key != key:
+                return
+            head, _ = self._decode_window(next_song["path"], seconds, from_end=False)
+        except Exception as e:
+            print(f"Crossfade decode error: {e}")
+            return
+
+        with self._lock:
+            if self._prepare_key != key:
+                return
+            self._prepared = {
+                "tail": tail,
+                "head": head,
+                "track_length": tail_length,
+                "next_index": next_index,
+                "next_song": next_song,
+                "seconds": seconds,
+            }
+        self._record_stat("decode_cpu_ms", (time.thread_time() - cpu_start) * 1000)
+        self._record_stat("decode_wall_ms", (time.perf_counter() - wall_start) * 1000)
+
+    def _decode_window(self, path, seconds, from_end):
+        """Return (Sound holding only the window, decoded track length in seconds)"""
+        frequency, fmt, channels = pygame.mixer.get_init()
+        frame_bytes = channels * abs(fmt) // 8
+
+        # Slice the decoded samples in place; only the window gets copied
+        full = self.sound_source(path)
+        samples = memoryview(full.get_view()).cast("B")
+
+        total_frames = len(samples) // frame_bytes
+        window_frames = min(total_frames, int(seconds * frequency))
+        if from_end:
+            start = (total_frames - window_frames) * frame_bytes
+            window = samples[start:total_frames * frame_bytes]
+        else:
+            window = samples[:window_frames * frame_bytes]
+
+        sound = pygame.mixer.Sound(buffer=window)
+        window.release()
+        samples.release()
+        return sound, total_frames / float(frequency)
+
+    # ----- Scheduling -----
+
+    def seconds_until_start(self, position_seconds):
+        """Time left before the overlap window begins, or None if not prepared"""
+        prepared = self._prepared
+        if prepared is None:
+            return None
+        return prepared["track_length"] - prepared["seconds"] - position_seconds
+
+    def arm(self, delay_seconds):
+        """Start the transition `delay_seconds` from now on a timing thread"""
+        if self.armed or self.active or self._prepared is None:
+            return
+        self.armed = True
+        self._cancel = threading.Event()
+        self._wake = threading.Event()
+        deadline = time.perf_counter() + max(0.0, delay_seconds)
+        threading.Thread(target=self._run, args=(deadline, self._cancel, self._wake), daemon=True).start()
+
+    def cancel(self):
+        """Abort a pending or running transition and drop decoded buffers"""
+        with self._lock:
+            self._cancel.set()
+            self._wake.set()
+            self._handoff = None
+            self._prepared = None
+            self._prepare_key = None
+            channels = (self._tail_channel, self._head_channel)
+            self._tail_channel = None
+            self._head_channel = None
+        for channel in channels:
+            if channel is not None:
+                channel.stop()
+        self.armed = False
+        self.active = False
+
+    def finish_now(self):
+        """Cut a running overlap short and hand the incoming track over at
+        the position reached. Returns False if there was nothing to hand off."""
+        with self._lock:
+            handoff, self._handoff = self._handoff, None
+            wake = self._wake
+        if handoff is None:
+            return False
+        wake.set()
+        return handoff()
+
+    def _reset(self, cancel):
+        """Stop the overlap channels and clear flags, unless a newer run owns them"""
+        with self._lock:
+            if self._cancel is not cancel:
+                return
+            channels = (self._tail_channel, self._head_channel)
+            self._tail_channel = None
+            self._head_channel = None
+            self._handoff = None
+        for channel in channels:
+            if channel is not None:
+                channel.stop()
+        self.armed = False
+        self.active = False
+
+    @staticmethod
+    def _sleep_until(deadline, wake):
+        # Coarse sleep, then a short spin for the last couple of milliseconds
+        while not wake.is_set():
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return True
+            if remaining > 0.003:
+                wake.wait(remaining - 0.002)
+        return False
+
+    def _submit_stream(self, fn, cancel, on_done=None):
+        """Queue a stream operation unless this transition has been cancelled.
+
+        cancel() sets the event under the same lock, so once a user command
+        has cancelled the transition nothing more is queued behind it, and
+        anything already queued turns into a no-op.
+        """
+        def command():
+            if not cancel.is_set():
+                fn()
+
+        with self._lock:
+            if cancel.is_set():
+                return False
+            self.submit(command, on_done)
+        return True
+
+    def _run(self, deadline, cancel, wake):
+        handed_off = False
+        try:
+            handed_off = self._transition(deadline, cancel, wake)
+        except Exception as e:
+            print(f"Crossfade error: {e}")
+        finally:
+            # Once the hand-off is queued it resets the state itself
+            if not handed_off:
+                self._reset(cancel)
+
+    def _transition(self, deadline, cancel, wake):
+        """Run one crossfade; True once the hand-off to the stream is queued"""
+        if not self._sleep_until(deadline, wake):
+            return False
+
+        with self._lock:
+            prepared = self._prepared
+            self._prepared = None
+        if prepared is None or cancel.is_set():
+            return False
+
+        cpu_start = time.thread_time()
+        tail, head = prepared["tail"], prepared["head"]
+        tail.set_volume(self.volume_getter())
+        head.set_volume(0.0)
+        next_path = prepared["next_song"]["path"]
+
+        self.active = True
+        self.armed = False
+
+        begun = threading.Event()
+        state = {"started": None, "loaded": False, "error": None}
+
+        def begin():
+            self.stop_output()
+            tail_channel = tail.play()
+            head_channel = head.play()
+            state["started"] = time.perf_counter()
+            with self._lock:
+                self._tail_channel = tail_channel
+                self._head_channel = head_channel
+            if tail_channel is None or head_channel is None:
+                raise RuntimeError("no free mixer channel")
+            begun.set()
+            # Load the next track while the overlap plays so the hand-off is cheap
+            pygame.mixer.music.load(next_path)
+            state["loaded"] = True
+
+        def begin_done(error):
+            state["error"] = error
+            begun.set()
+
+        if not self._submit_stream(begin, cancel, begin_done):
+            return False
+        while not begun.wait(0.05):
+            if cancel.is_set():
+                return False
+        if cancel.is_set():
+            return False
+        if state["started"] is None:
+            raise RuntimeError(state["error"])
+
+        started = state["started"]
+        duration = prepared["seconds"]
+        self._record_stat("start_error_ms", (started - deadline) * 1000)
+
+        def handoff(offset, requested):
+            try:
+                handoff_at = time.perf_counter()
+                if not state["loaded"]:
+                    pygame.mixer.music.load(next_path)
+                try:
+                    pygame.mixer.music.play(start=offset)
+                except Exception:
+                    # Not every format can seek; restart the track instead
+                    pygame.mixer.music.play()
+                    offset = 0.0
+                pygame.mixer.music.set_volume(self.volume_getter())
+                self._record_stat("handoff_error_ms", (handoff_at - requested) * 1000)
+            except Exception as e:
+                print(f"Crossfade hand-off error: {e}")
+                return
+            finally:
+                self._reset(cancel)
+
+            if self.on_complete:
+                self.on_complete(prepared["next_index"], offset)
+
+        def submit_handoff():
+            now = time.perf_counter()
+            offset = min(duration, now - started)
+            return self._submit_stream(lambda: handoff(offset, now), cancel)
+
+        with self._lock:
+            if cancel.is_set():
+                return False
+            self._handoff = submit_handoff
+
+        if self.on_start:
+            self.on_start(prepared["next_index"])
+
+        max_late = 0.0
+        steps = max(1, int(duration / CROSSFADE_RAMP_STEP))
+        for step in range(1, steps + 1):
+            target = started + step * CROSSFADE_RAMP_STEP
+            if not self._sleep_until(target, wake):
+                break
+            max_late = max(max_late, time.perf_counter() - target)
+
+            # Equal-power curves keep perceived loudness flat through the overlap
+            t = min(1.0, (time.perf_counter() - started) / duration)
+            master = self.volume_getter()
+            tail.set_volume(master * math.cos(t * math.pi / 2))
+            head.set_volume(master * math.sin(t * math.pi / 2))
+        else:
+            self._sleep_until(started + duration, wake)
+
+        if cancel.is_set():
+            return False
+        self._record_stat("ramp_jitter_ms", max_late * 1000)
+        self._record_stat("transition_cpu_ms", (time.thread_time() - cpu_start) * 1000)
+
+        with self._lock:
+            handoff_fn, self._handoff = self._handoff, None
+        if handoff_fn is None:
+            return True     # finish_now() already handed off
+        return handoff_fn()
+
+
+# ---------- Decoded audio cache ----------
+
+class AudioCache:
+    """LRU cache of fully decoded tracks, bounded by a memory budget.
+
+    Cached tracks are held as pygame.mixer.Sound objects so a restart is a
+    plain Channel.play() and a seek only copies the remaining samples instead
+    of decoding the file again. Decoding happens on a single background
+    worker; a budget of 0 disables the cache.
+    """
+
+    def __init__(self, budget_mb=0):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Start latency of cached tracks in ms: kind -> [count, total, max]
+        self.start_ms = {"restart": [0, 0.0, 0.0], "seek": [0, 0.0, 0.0]}
+
+        self._entries = OrderedDict()   # path -> (Sound, size in bytes)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+
+    @property
+    def enabled(self):
+        return self.budget_bytes > 0
+
+    def set_budget(self, budget_mb):
+        with self._lock:
+            self.budget_bytes = int(max(0, budget_mb) * 1024 * 1024)
+            self._evict_locked()
+
+    def get(self, path):
+        """Return the cached Sound for path (counting a hit or miss), or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, path):
+        """Like get(), but without touching LRU order or statistics"""
+        with self._lock:
+            entry = self._entries.get(path)
+        return entry[0] if entry else None
+
+    def prefetch(self, path):
+        """Queue path for decoding on the background worker"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if path in self._entries or path in self._pending:
+                return
+            self._pending.add(path)
+            # Called from both the Tk thread and the audio worker
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._decode_loop, daemon=True)
+                self._worker.start()
+        self._queue.put(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def record_start(self, kind, elapsed_ms):
+        """Record how long a cached restart or seek took to start playing"""
+        entry = self.start_ms[kind]
+        entry[0] += 1
+        entry[1] += elapsed_ms
+        entry[2] = max(entry[2], elapsed_ms)
+
+    def start_summary(self):
+        return ", ".join(f"{kind} avg={total / count:.2f}ms max={peak:.2f}ms (n={count})"
+                         for kind, (count, total, peak) in self.start_ms.items() if count)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "used_mb": self.used_bytes / (1024 * 1024),
+            "budget_mb": self.budget_bytes / (1024 * 1024),
+        }
+
+    def _decode_loop(self):
+        while True:
+            path = self._queue.get()
+            try:
+                sound = pygame.mixer.Sound(path)
+                size = self._sound_size(sound)
+            except Exception as e:
+                print(f"Cache decode error: {e}")
+                sound = None
+
+            with self._lock:
+                self._pending.discard(path)
+                if sound is None or size > self.budget_bytes:
+                    continue
+                self._entries[path] = (sound, size)
+                self.used_bytes += size
+                self._evict_locked()
+
+    def _evict_locked(self):
+        while self.used_bytes > self.budget_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.used_bytes -= size
+            self.evictions += 1
+
+    @staticmethod
+    def _sound_size(sound):
+        frequency, fmt, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency) * channels * abs(fmt) // 8
+
+    @staticmethod
+    def slice_from(sound, start_seconds):
+        """New Sound holding the samples of `sound` from start_seconds onwards"""
+        frequency, fmt, channels = pygame.mixer.get_init()
+        frame_bytes = channels * abs(fmt) // 8
+        with memoryview(sound.get_view()) as view, view.cast("B") as samples:
+            offset = min(len(samples), int(start_seconds * frequency) * frame_bytes)
+            with samples[offset:] as rest:
+                return pygame.mixer.Sound(buffer=rest)
+
+
+# ---------- Read-ahead prefetch ----------
+
+class ReadAheadPrefetcher:
+    """Warm the OS page cache for upcoming tracks on a background thread.
+
+    Files are read sequentially in chunks. Where the platform supports it,
+    each read is preceded by a POSIX_FADV_WILLNEED hint for the following
+    chunk, so the kernel fetches it during the throttle sleep (plain reads
+    also cover Windows and network mounts that ignore fadvise). Reads are
+    throttled to
+    `rate_mb_s` so they do not compete with the stream that is playing,
+    and a new schedule() aborts whatever is still being read.
+    """
+
+    CHUNK_BYTES = 256 * 1024
+
+    def __init__(self, depth=2, rate_mb_s=8, max_mb_per_file=32):
+        self.depth = depth
+        self.rate_bytes = rate_mb_s * 1024 * 1024
+        self.max_bytes = max_mb_per_file * 1024 * 1024
+
+        self._warm = OrderedDict()      # recently warmed paths, bounded
+        self._targets = []
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._worker = None
+
+        # Play-start latency in ms, split by whether the file was prefetched
+        self.latency = {"warm": [], "cold": []}
+
+    @property
+    def enabled(self):
+        return self.depth > 0
+
+    def schedule(self, paths):
+        """Replace the read-ahead list with `paths` (in play order)"""
+        if not self.enabled:
+            return
+        with self._cond:
+            self._generation += 1
+            self._targets = [p for p in paths[:self.depth] if p not in self._warm]
+            self._cond.notify()
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, daemon=True)
+            self._worker.start()
+
+    def is_warm(self, path):
+        with self._cond:
+            return path in self._warm
+
+    def record_start(self, path, elapsed_ms):
+        key = "warm" if self.is_warm(path) else "cold"
+        samples = self.latency[key]
+        samples.append(elapsed_ms)
+        if len(samples) > 200:
+            del samples[0]
+
+    def latency_summary(self):
+        parts = []
+        for key in ("warm", "cold"):
+            samples = sorted(self.latency[key])
+            if samples:
+                median = samples[len(samples) // 2]
+                parts.append(f"{key} n={len(samples)} median={median:.1f}ms max={samples[-1]:.1f}ms")
+        return ", ".join(parts)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._targets:
+                    self._cond.wait()
+                path = self._targets.pop(0)
+                generation = self._generation
+
+            if self._read_ahead(path, generation):
+                with self._cond:
+                    self._warm[path] = True
+                    while len(self._warm) > 64:
+                        self._warm.popitem(last=False)
+
+    def _read_ahead(self, path, generation):
+        """Pull the file through the page cache; False if superseded or failed"""
+        try:
+            with open(path, "rb", buffering=0) as f:
+                advise = hasattr(os, "posix_fadvise")
+                started = time.perf_counter()
+                total = 0
+                while total < self.max_bytes:
+                    if generation != self._generation:
+                        return False
+                    # Hint the chunk after this one: the kernel fetches it while
+                    # we sleep off the throttle, and stays one chunk ahead at most
+                    if advise and total + self.CHUNK_BYTES < self.max_bytes:
+                        os.posix_fadvise(f.fileno(), total + self.CHUNK_BYTES,
+                                         self.CHUNK_BYTES, os.POSIX_FADV_WILLNEED)
+                    chunk = f.read(self.CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+
+                    # Throttle to the configured rate
+                    ahead = total / self.rate_bytes - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except OSError as e:
+            print(f"Prefetch error: {e}")
+            return False
+        return True
+
+
+# ---------- Audio worker & main-loop monitor ----------
+
+class AudioWorker:
+    """Run playback commands on a single background thread.
+
+    Commands submitted with the same `key` coalesce: a newer one replaces
+    any that are still waiting, so next/next/next only loads the last
+    target. Commands without a key always run, in submission order.
+    `on_done(error)` is called on the worker thread after a command runs.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        self.max_command_ms = 0.0
+
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, key=None, on_done=None):
+        with self._cond:
+            if key is not None:
+                kept = [cmd for cmd in self._pending if cmd[0] != key]
+                self.coalesced += len(self._pending) - len(kept)
+                self._pending = kept
+            self._pending.append((key, fn, on_done))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                _, fn, on_done = self._pending.pop(0)
+
+            started = time.perf_counter()
+            error = None
+            try:
+                fn()
+            except Exception as e:
+                error = e
+            self.executed += 1
+            self.max_command_ms = max(self.max_command_ms, (time.perf_counter() - started) * 1000)
+
+            if on_done:
+                on_done(error)
+
+
+class MainLoopMonitor:
+    """Measure how late Tk timer callbacks fire, i.e. main-thread stalls"""
+
+    def __init__(self, root, interval_ms=50):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.samples = []
+        self._expected = None
+
+    def start(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000.0
+        self.root.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.samples.append((now - self._expected) * 1000)
+        if len(self.samples) > 5000:
+            del self.samples[:1000]
+        self._expected = now + self.interval_ms / 1000.0
+        self.root.after(self.interval_ms, self._tick)
+
+    def summary(self):
+        if not self.samples:
+            return ""
+        stalls = sorted(self.samples)
+        p99 = stalls[min(len(stalls) - 1, int(len(stalls) * 0.99))]
+        over = sum(1 for s in stalls if s > 100)
+        return f"max {stalls[-1]:.0f}ms, p99 {p99:.0f}ms, {over} stalls over 100ms"
+
+
+# ---------- Library scanning ----------
+
+class LibraryScanner:
+    """Scan several library roots into one ordered, de-duplicated song list.
+
+    Roots are grouped by the device they live on and each device is walked
+    by its own thread, so a slow network share does not hold up a local
+    disk. Files are identified by (st_dev, st_ino), falling back to the
+    resolved path where no inode is available: the same file reached
+    through overlapping roots, symlinked folders or hardlinks appears once.
+    """
+
+    def __init__(self, length_fn):
+        self.length_fn = length_fn
+
+    def scan(self, roots):
+        groups = OrderedDict()
+        for root in roots:
+            try:
+                dev = os.stat(root).st_dev
+            except OSError as e:
+                print(f"Skipping library root {root}: {e}")
+                continue
+            groups.setdefault(dev, []).append(root)
+
+        if not groups:
+            return []
+
+        with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+            results = list(pool.map(self._scan_device, groups.values()))
+
+        # Merge per-device results; nested mounts can still repeat a file
+        songs = []
+        seen = set()
+        for song in sorted((s for r in results for s in r), key=self._sort_key):
+            if song["inode"] in seen:
+                continue
+            seen.add(song["inode"])
+            songs.append(song)
+        return songs
+
+    @staticmethod
+    def _sort_key(song):
+        return (os.path.basename(song["path"]).lower(), song["path"])
+
+    def _scan_device(self, roots):
+        songs = []
+        seen = set()
+        for root in roots:
+            for path, key in self._walk(root):
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                length_seconds = self.length_fn(path)
+                songs.append({
+                    "path": path,
+                    "title": os.path.splitext(os.path.basename(path))[0],
+                    "length": length_seconds,
+                    "inode": key,
+                    "id": track_id(path)
+                })
+        return songs
+
+    @staticmethod
+    def _file_key(path, st=None):
+        """Identity of a file: (st_dev, st_ino), or its resolved path if the
+        platform gives no inode (os.DirEntry.stat() on Windows reports 0)"""
+        if st is None or not st.st_ino:
+            st = os.stat(path)
+        if st.st_ino:
+            return (st.st_dev, st.st_ino)
+        return ("path", os.path.normcase(os.path.realpath(path)))
+
+    def _walk(self, root):
+        """Yield (path, identity key) for audio files below root, following symlinks once"""
+        stack = [root]
+        visited_dirs = set()
+        while stack:
+            folder = stack.pop()
+            try:
+                key = self._file_key(folder)
+                if key in visited_dirs:
+                    continue
+                visited_dirs.add(key)
+                entries = list(os.scandir(folder))
+            except OSError as e:
+                print(f"Error scanning {folder}: {e}")
+                continue
+
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                        yield entry.path, self._file_key(entry.path, entry.stat())
+                except OSError:
+                    continue
+
+
+# ---------- Play history ----------
+
+def track_id(path):
+    """Stable 64-bit id for a track, derived from its normalised path"""
+    key = os.path.normcase(os.path.abspath(path)).encode("utf-8", "surrogateescape")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+class PlayHistory:
+    """Append-only log of plays with in-memory aggregates.
+
+    Every play is a fixed 24-byte record (track id, start time, seconds
+    listened, skipped flag). Records are buffered and written by a
+    background thread with a single fsync per batch. Aggregates per track
+    (plays, skips, last played, seconds listened) are kept in memory and
+    snapshotted periodically to a JSON file together with the log offset
+    they cover, so startup only replays the records appended since then.
+    """
+
+    RECORD = struct.Struct("<QdfB3x")
+    FLUSH_INTERVAL = 5.0   # seconds
+    FLUSH_BATCH = 32       # records
+    COMPACT_EVERY = 12     # flushes that wrote records
+
+    def __init__(self, log_path=HISTORY_FILE, stats_path=HISTORY_STATS_FILE):
+        self.log_path = log_path
+        self.stats_path = stats_path
+        self.aggregates = {}    # track id -> [plays, skips, last played, seconds listened]
+
+        self._batch = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()   # serialises log appends and snapshots
+        self._offset = 0
+        self._load()
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    # ----- Recording -----
+
+    def record(self, tid, started, listened, skipped):
+        with self._lock:
+            self._batch.append(self.RECORD.pack(tid, started, listened, 1 if skipped else 0))
+            self._apply(tid, started, listened, skipped)
+            flush_now = len(self._batch) >= self.FLUSH_BATCH
+        if flush_now:
+            # Never fsync on the caller's (Tk) thread
+            self._wake.set()
+
+    def flush(self):
+        """Append buffered records to the log; True if anything was written"""
+        with self._write_lock:
+            with self._lock:
+                batch, self._batch = self._batch, []
+            if not batch:
+                return False
+            try:
+                with open(self.log_path, "ab") as f:
+                    f.write(b"".join(batch))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                print(f"Error writing play history: {e}")
+                return False
+        return True
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+        self.compact()
+
+    def _flush_loop(self):
+        flushes = 0
+        while not self._stop.is_set():
+            self._wake.wait(self.FLUSH_INTERVAL)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            if self.flush():
+                flushes += 1
+            # Snapshot now and then so a crash does not mean a long replay
+            if flushes >= self.COMPACT_EVERY:
+                self.compact()
+                flushes = 0
+
+    # ----- Aggregates -----
+
+    def _apply(self, tid, started, listened, skipped):
+        agg = self.aggregates.get(tid)
+        if agg is None:
+            agg = self.aggregates[tid] = [0, 0, 0.0, 0.0]
+        agg[0] += 1
+        agg[1] += 1 if skipped else 0
+        agg[2] = max(agg[2], started)
+        agg[3] += listened
+
+    def _load(self):
+        """Restore the last snapshot, then replay records appended after it"""
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self._offset = snapshot["offset"]
+            self.aggregates = {int(k): v for k, v in snapshot["tracks"].items()}
+        except (OSError, ValueError, KeyError):
+            self._offset = 0
+            self.aggregates = {}
+
+        try:
+            with open(self.log_path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size < self._offset:
+                    # Log was replaced or truncated; rebuild from scratch
+                    self._offset = 0
+                    self.aggregates = {}
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"Error reading play history: {e}")
+            return
+
+        # Drop a partial record left by a crash mid-write
+        whole = len(data) - len(data) % self.RECORD.size
+        for tid, started, listened, skipped in self.RECORD.iter_unpack(data[:whole]):
+            self._apply(tid, started, listened, skipped)
+        self._offset += whole
+        if whole != len(data):
+            try:
+                with open(self.log_path, "r+b") as f:
+                    f.truncate(self._offset)
+            except OSError as e:
+                print(f"Error repairing play history: {e}")
+
+    def compact(self):
+        """Snapshot the aggregates so the next start skips the replayed log"""
+        with self._write_lock:
+            with self._lock:
+                # Buffered records are counted but not on disk yet; a snapshot
+                # now would replay them twice once they are flushed
+                if self._batch:
+                    return
+                snapshot = {
+                    "offset": os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0,
+                    "tracks": {str(k): list(v) for k, v in self.aggregates.items()}
+                }
+
+            try:
+                atomic_write_json(self.stats_path, snapshot)
+            except OSError as e:
+                print(f"Error saving play history stats: {e}")
+
+    # ----- Queries -----
+
+    def stats(self, tid):
+        agg = self.aggregates.get(tid)
+        if agg is None:
+            return None
+        plays, skips, last_played, listened = agg
+        return {
+            "plays": plays,
+            "skips": skips,
+            "skip_rate": skips / plays if plays else 0.0,
+            "last_played": last_played,
+            "listened": listened
+        }
+
+    def most_played(self, n=50, among=None):
+        """Track ids with the most completed (non-skipped) plays"""
+        items = self.aggregates.items()
+        if among is not None:
+            items = ((k, v) for k, v in items if k in among)
+        return [k for k, v in heapq.nlargest(n, items, key=lambda kv: (kv[1][0] - kv[1][1], kv[1][2]))]
+
+    def recently_played(self, n=50, among=None):
+        items = self.aggregates.items()
+        if among is not None:
+            items = ((k, v) for k, v in items if k in among)
+        return [k for k, v in heapq.nlargest(n, items, key=lambda kv: kv[1][2])]
+
+
+# ---------- Session persistence ----------
+
+class SessionStore:
+    """Write the session config atomically on a background thread.
+
+    save_async() hands over a ready-made dict; if several arrive while a
+    write is in progress only the newest is written. save() writes
+    synchronously and is used on exit. Every snapshot gets a sequence
+    number and older ones are never written over newer ones.
+    """
+
+    def __init__(self, path=CONFIG_FILE):
+        self.path = path
+        self.writes = 0
+        self._latest = None
+        self._seq = 0
+        self._written_seq = 0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def save_async(self, config):
+        with self._cond:
+            self._seq += 1
+            self._latest = (self._seq, config)
+            self._cond.notify()
+
+    def save(self, config):
+        with self._cond:
+            self._seq += 1
+            seq = self._seq
+            self._latest = None
+        self._write(seq, config)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._latest is None:
+                    self._cond.wait()
+                (seq, config), self._latest = self._latest, None
+            self._write(seq, config)
+
+    def _write(self, seq, config):
+        with self._write_lock:
+            if seq <= self._written_seq:
+                return  # a newer snapshot is already on disk
+            try:
+                atomic_write_json(self.path, config, indent=2)
+                self._written_seq = seq
+                self.writes += 1
+            except OSError as e:
+                print(f"Error saving config: {e}")
+
+
 class MusicPlayerGUI:
     def __init__(self, root):
         self.root = root
@@ -39,8 +1107,54 @@ class MusicPlayerGUI:
         self.play_start_time = None
         self.auto_next_enabled = True
         self.manual_stop = False
-        self.last_folder = None
+        self.library_roots = []
         self.loading_in_progress = False
+        self.queued_scan = None
+        self.position_offset = 0.0
+        self.current_volume = 0.7
+        self.playing_index = None       # track on the output; current_index is the selection
+
+        # Decoded-track cache; cached tracks play on a reserved mixer channel
+        self.audio_cache = AudioCache()
+        pygame.mixer.set_reserved(1)
+        self.output_channel = pygame.mixer.Channel(0)
+        self.channel_active = False
+        self.channel_started = None
+        self.channel_paused_at = None
+        self.last_start_ms = 0.0
+
+        # Page-cache read-ahead of the next few tracks in play order
+        self.prefetcher = ReadAheadPrefetcher()
+
+        # Session autosave (debounced on the Tk thread, written off it)
+        self.session_store = SessionStore()
+        self.crossfade_after_id = None
+        self.save_after_id = None
+        self.last_checkpoint = 0.0
+        self.pending_resume = None      # (track id, position) until the library loads
+        self.resume_index = None
+        self.resume_position = None
+
+        # Play history: one record per listen, aggregated for the views
+        self.history = PlayHistory()
+        self.listen = None
+        self.song_ids = {}
+
+        # Playback commands run on the audio worker, never on the Tk thread
+        self.audio_worker = AudioWorker()
+        self.play_token = 0
+        self.play_pending = None
+
+        # Crossfade between tracks (0 disables it)
+        self.crossfader = Crossfader(
+            seconds=0,
+            volume_getter=lambda: self.current_volume,
+            on_start=lambda index: self.root.after(0, self._on_crossfade_start, index),
+            on_complete=lambda index, offset: self.root.after(0, self._on_crossfade_complete, index, offset),
+            sound_source=lambda path: self.audio_cache.peek(path) or pygame.mixer.Sound(path),
+            stop_output=self._output_stop,
+            submit=lambda fn, on_done=None: self.audio_worker.submit(fn, key="transport", on_done=on_done)
+        )
 
         # UI setup
         self._setup_style()
@@ -52,13 +1166,16 @@ class MusicPlayerGUI:
         # Start updating progress bar
         self._schedule_progress_update()
 
+        self.loop_monitor = MainLoopMonitor(self.root)
+        self.loop_monitor.start()
+
         # Save config on close
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
 
     # ---------- Configuration Persistence ----------
 
     def _load_config(self):
-        """Load previous folder and playback position from config file"""
+        """Load previous library, track and playback position from config file"""
         if not os.path.exists(CONFIG_FILE):
             return
 
@@ -66,38 +1183,103 @@ class MusicPlayerGUI:
             with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
                 config = json.load(f)
             
-            folder = config.get('last_folder')
+            roots = config.get('library_roots')
+            if roots is None and config.get('last_folder'):
+                roots = [config['last_folder']]
+            # Keep roots that are missing right now (e.g. an unmounted share);
+            # the scanner skips them and they come back once available
+            roots = list(roots or [])
             last_index = config.get('last_index', 0)
             volume = config.get('volume', 70)
-
-            if folder and os.path.exists(folder):
-                self.last_folder = folder
+            crossfade = config.get('crossfade', 0)
+            self.audio_cache.set_budget(config.get('cache_mb', 0))
+            self.prefetcher.depth = max(0, int(config.get('prefetch_tracks', self.prefetcher.depth)))
+            self.auto_next_enabled = config.get('auto_next', True)
+            if config.get('view') in PLAYLIST_VIEWS:
+                self.view_var.set(config['view'])
+
+            self.crossfade_scale.set(crossfade)
+            self.on_crossfade_change(crossfade)
+
+            if roots:
+                self.library_roots = roots
                 self.volume_scale.set(volume)
-                pygame.mixer.music.set_volume(volume / 100.0)
+                self.current_volume = volume / 100.0
+                pygame.mixer.music.set_volume(self.current_volume)
+                if config.get('track_id') is not None:
+                    self.pending_resume = (config['track_id'], float(config.get('position', 0)))
                 
                 # Load songs in background
-                self._load_songs_threaded(folder, last_index)
+                self._load_songs_threaded(roots, last_index)
         except Exception as e:
             print(f"Error loading config: {e}")
 
-    def _save_config(self):
-        """Save current folder and playback position to config file"""
-        config = {
-            'last_folder': self.last_folder,
-            'last_index': self.current_index if self.current_index is not None else 0,
-            'volume': int(self.volume_scale.get())
+    def _session_state(self):
+        """Snapshot of everything needed to resume this session"""
+        track, position = None, 0.0
+        # The playing track wins over a row that was merely clicked
+        index = self.playing_index if self.playing_index is not None else self.current_index
+        if self.pending_resume is not None:
+            # Library still loading: keep what the last session saved
+            track, position = self.pending_resume
+        elif self.songs and index is not None:
+            track = self.songs[index]["id"]
+            position = self._current_position()
+
+        return {
+            'library_roots': self.library_roots,
+            'last_index': index if index is not None else 0,
+            'track_id': track,
+            'position': round(position, 2),
+            'view': self.view_var.get(),
+            'auto_next': self.auto_next_enabled,
+            'volume': int(self.volume_scale.get()),
+            'crossfade': int(round(self.crossfade_scale.get())),
+            'cache_mb': self.audio_cache.budget_bytes // (1024 * 1024),
+            'prefetch_tracks': self.prefetcher.depth
         }
-        
-        try:
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2)
-        except Exception as e:
-            print(f"Error saving config: {e}")
+
+    def _save_config(self):
+        """Save the session to the config file right away"""
+        if self.save_after_id is not None:
+            self.root.after_cancel(self.save_after_id)
+            self.save_after_id = None
+        self.session_store.save(self._session_state())
+
+    def _schedule_save(self):
+        """Debounced autosave: bursts of changes produce a single write"""
+        if self.save_after_id is not None:
+            self.root.after_cancel(self.save_after_id)
+        self.save_after_id = self.root.after(SESSION_SAVE_DELAY_MS, self._autosave)
+
+    def _autosave(self):
+        self.save_after_id = None
+        self.last_checkpoint = time.time()
+        self.session_store.save_async(self._session_state())
 
     def _on_closing(self):
         """Handle window close event"""
         self._save_config()
-        pygame.mixer.music.stop()
+        self.crossfader.cancel()
+        self._output_stop()
+        self._finish_listen(skipped=False)
+        self.history.close()
+        if self.audio_cache.enabled:
+            stats = self.audio_cache.stats()
+            print(f"Audio cache: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"hit rate {stats['hit_rate']:.0%}, {stats['used_mb']:.1f}/{stats['budget_mb']:.0f} MB")
+            starts = self.audio_cache.start_summary()
+            if starts:
+                print(f"Cached start latency: {starts}")
+        latency = self.prefetcher.latency_summary()
+        if latency:
+            print(f"Play-start latency: {latency}")
+        crossfade = self.crossfader.stats_summary()
+        if crossfade:
+            print(f"Crossfade: {crossfade}")
+        print(f"Main loop: {self.loop_monitor.summary()}; audio worker: "
+              f"{self.audio_worker.executed} commands, {self.audio_worker.coalesced} coalesced, "
+              f"slowest {self.audio_worker.max_command_ms:.0f}ms")
         self.root.destroy()
 
     # ---------- UI & Style ----------
@@ -232,6 +1414,14 @@ class MusicPlayerGUI:
         )
         choose_btn.pack(side=tk.RIGHT, pady=10)
 
+        add_btn = ttk.Button(
+            top_frame,
+            text="➕  Add Folder",
+            style="Accent.TButton",
+            command=self.add_folder
+        )
+        add_btn.pack(side=tk.RIGHT, pady=10, padx=(0, 10))
+
         # Main content area
         main_frame = ttk.Frame(container)
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -264,6 +1454,17 @@ class MusicPlayerGUI:
         )
         self.song_count_label.pack(side=tk.RIGHT)
 
+        self.view_var = tk.StringVar(value=PLAYLIST_VIEWS[0])
+        view_box = ttk.Combobox(
+            playlist_header,
+            textvariable=self.view_var,
+            values=PLAYLIST_VIEWS,
+            state="readonly",
+            width=15
+        )
+        view_box.pack(side=tk.RIGHT, padx=(0, 10))
+        view_box.bind("<<ComboboxSelected>>", self._on_view_change)
+
         # Treeview for playlist
         tree_frame = ttk.Frame(playlist_card, style="Card.TFrame")
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=(0, 15))
@@ -484,6 +1685,25 @@ class MusicPlayerGUI:
         self.volume_scale.set(70)
         pygame.mixer.music.set_volume(0.7)
 
+        self.crossfade_label = ttk.Label(
+            volume_section,
+            text="Crossfade: off",
+            style="Card.TLabel",
+            font=("Segoe UI", 9, "bold"),
+            foreground=self.text_secondary
+        )
+        self.crossfade_label.grid(row=1, column=1, sticky="w", pady=(8, 0))
+
+        self.crossfade_scale = ttk.Scale(
+            volume_section,
+            from_=0,
+            to=MAX_CROSSFADE_SECONDS,
+            orient="horizontal",
+            command=self.on_crossfade_change,
+            style="TScale"
+        )
+        self.crossfade_scale.grid(row=1, column=2, sticky="ew", padx=(10, 0), pady=(8, 0))
+
     def _create_card(self, parent, title):
         """Helper to create modern card-style frames"""
         card = tk.Frame(
@@ -501,12 +1721,23 @@ class MusicPlayerGUI:
         if not folder:
             return
         
-        self.last_folder = folder
-        self._load_songs_threaded(folder, 0)
+        self.library_roots = [folder]
+        self._load_songs_threaded(self.library_roots, 0)
+
+    def add_folder(self):
+        """Add another root folder to the library"""
+        folder = filedialog.askdirectory()
+        if not folder or folder in self.library_roots:
+            return
+
+        self.library_roots = self.library_roots + [folder]
+        self._load_songs_threaded(self.library_roots, 0)
 
-    def _load_songs_threaded(self, folder_path, start_index=0):
+    def _load_songs_threaded(self, roots, start_index=0):
         """Load songs in a background thread to prevent UI freezing"""
         if self.loading_in_progress:
+            # Rescan once the running scan is done; the newest request wins
+            self.queued_scan = (list(roots), start_index)
             return
         
         self.loading_in_progress = True
@@ -514,62 +1745,135 @@ class MusicPlayerGUI:
         
         def load_task():
             try:
-                self._load_songs_from_folder(folder_path, start_index)
+                self._load_songs_from_roots(roots, start_index)
             finally:
-                self.loading_in_progress = False
+                self.root.after(0, self._on_scan_finished)
         
         thread = threading.Thread(target=load_task, daemon=True)
         thread.start()
 
-    def _load_songs_from_folder(self, folder_path, start_index=0):
-        """Fast song loading using mutagen for metadata"""
-        self.songs.clear()
-        
-        # Clear tree in main thread
-        self.root.after(0, lambda: [self.tree.delete(item) for item in self.tree.get_children()])
-
-        files = sorted(
-            f for f in os.listdir(folder_path)
-            if f.lower().endswith(AUDIO_EXTENSIONS)
-        )
-
-        if not files:
-            self.root.after(0, lambda: messagebox.showinfo("No songs", "No audio files found in this folder."))
+    def _on_scan_finished(self):
+        self.loading_in_progress = False
+        if self.queued_scan is not None:
+            roots, start_index = self.queued_scan
+            self.queued_scan = None
+            self._load_songs_threaded(roots, start_index)
+
+    def _load_songs_from_roots(self, roots, start_index=0):
+        """Scan all library roots in parallel and show the merged list"""
+        songs = LibraryScanner(self._get_audio_length_fast).scan(roots)
+
+        if not songs:
+            self.root.after(0, lambda: messagebox.showinfo("No songs", "No audio files found in the library folders."))
+            self.root.after(0, self._restore_now_playing_label)
             return
 
-        for idx, filename in enumerate(files, start=1):
-            full_path = os.path.join(folder_path, filename)
-            title = os.path.splitext(filename)[0]
-            length_seconds = self._get_audio_length_fast(full_path)
+        self.root.after(0, self._show_library, songs, start_index)
 
-            song_data = {
-                "path": full_path,
-                "title": title,
-                "length": length_seconds
-            }
-            self.songs.append(song_data)
+    def _restore_now_playing_label(self):
+        if self._has_active_track():
+            self._update_details_panel(now_playing=True)
+        else:
+            self.now_playing_label.config(text="No song playing")
 
-            # Insert into tree in main thread
-            duration_str = self._format_time(length_seconds) if length_seconds else "—"
-            self.root.after(0, lambda i=idx, t=title, d=duration_str: 
-                           self.tree.insert("", "end", values=(i, t, d)))
+    def _has_active_track(self):
+        """True while a track is playing, paused, loading or crossfading"""
+        if not self.songs or self.playing_index is None:
+            return False
+        return (self.is_paused or self.play_pending is not None
+                or self.crossfader.active or self._output_busy())
+
+    def _show_library(self, songs, start_index=0):
+        """Replace the playlist with `songs` (runs on the Tk thread)"""
+        playing_id = self.songs[self.playing_index]["id"] if self._has_active_track() else None
+        selected_id = self.songs[self.current_index]["id"] if self.songs and self.current_index is not None else None
+
+        # A prepared crossfade points at an index in the old list
+        if self.crossfader.active:
+            self.crossfader.finish_now()
+        else:
+            self.crossfader.cancel()
+
+        self.songs = songs
+        self.song_ids = {song["id"]: i for i, song in enumerate(songs)}
+        self.current_index = None
+        self.playing_index = None
 
         # Update song count
-        count_text = f"{len(files)} song{'s' if len(files) != 1 else ''}"
-        self.root.after(0, lambda: self.song_count_label.config(text=count_text))
+        count_text = f"{len(songs)} song{'s' if len(songs) != 1 else ''}"
+        self.song_count_label.config(text=count_text)
+
+        # Keep following the track that is playing, at its index in the new list
+        if playing_id is not None:
+            if playing_id in self.song_ids:
+                self.playing_index = self.song_ids[playing_id]
+                self.current_index = self.song_ids.get(selected_id, self.playing_index)
+                self.current_length = songs[self.playing_index]["length"] or 0
+                self._refresh_playlist_view()
+                self._update_details_panel(now_playing=True)
+                if not self.is_paused:
+                    self._prepare_crossfade()
+                self._prefetch_upcoming()
+                self._schedule_save()
+                return
+            # The playing track is no longer part of the library
+            self.stop()
+
+        self._refresh_playlist_view()
+
+        # Resume the saved track by id; the index is only a fallback
+        self.resume_index = None
+        self.resume_position = None
+        if self.pending_resume is not None:
+            track, position = self.pending_resume
+            self.pending_resume = None
+            if track in self.song_ids:
+                start_index = self.song_ids[track]
+                self.resume_index = start_index
+                self.resume_position = position
 
         # Select the starting song
-        def select_song():
-            tree_items = self.tree.get_children()
-            if tree_items and 0 <= start_index < len(tree_items):
-                self.tree.selection_set(tree_items[start_index])
-                self.tree.focus(tree_items[start_index])
-                self.tree.see(tree_items[start_index])
-                self.current_index = start_index
-                self._update_details_panel()
-            self.now_playing_label.config(text="No song playing")
-        
-        self.root.after(0, select_song)
+        if 0 <= start_index < len(songs):
+            self.current_index = start_index
+            self._select_tree_row(start_index)
+            self._update_details_panel()
+            if self.resume_position:
+                self.current_length = songs[start_index]["length"] or 0
+                self._show_position(self.resume_position)
+        self.now_playing_label.config(text="No song playing")
+        self._schedule_save()
+
+    def _refresh_playlist_view(self):
+        """Fill the playlist with the library, or a history-based view of it"""
+        view = self.view_var.get()
+        if view == "Most played":
+            indices = [self.song_ids[t] for t in self.history.most_played(100, among=self.song_ids)]
+        elif view == "Recently played":
+            indices = [self.song_ids[t] for t in self.history.recently_played(100, among=self.song_ids)]
+        else:
+            indices = range(len(self.songs))
+
+        self.tree.delete(*self.tree.get_children())
+        for index in indices:
+            song = self.songs[index]
+            length_seconds = song["length"]
+            duration_str = self._format_time(length_seconds) if length_seconds else "—"
+            # Row ids are library indices so rows can be found in any view
+            self.tree.insert("", "end", iid=str(index), values=(index + 1, song["title"], duration_str))
+
+        if self.current_index is not None:
+            self._select_tree_row(self.current_index)
+
+    def _on_view_change(self, event=None):
+        self._refresh_playlist_view()
+        self._schedule_save()
+
+    def _select_tree_row(self, index):
+        iid = str(index)
+        if self.tree.exists(iid):
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+            self.tree.see(iid)
 
     def _get_audio_length_fast(self, path):
         """Fast audio length detection using mutagen (metadata based)"""
@@ -606,92 +1910,308 @@ class MusicPlayerGUI:
         if self.current_index is None and self.songs:
             self.current_index = 0
         if self.current_index is not None:
-            self._play_song_at_index(self.current_index)
+            start = self.resume_position if self.current_index == self.resume_index else 0.0
+            self._play_song_at_index(self.current_index, start=start or 0.0)
 
-    def _play_song_at_index(self, index):
+    def _play_song_at_index(self, index, start=0.0):
         if not self.songs:
             return
+        self.resume_index = None
+        self.resume_position = None
 
         index = index % len(self.songs)
         self.current_index = index
+        self.playing_index = index
         song = self.songs[index]
-        try:
-            pygame.mixer.music.load(song["path"])
-            pygame.mixer.music.play()
-            self.is_paused = False
-            self.play_pause_btn.config(text="⏸  Pause")
+        self.crossfader.cancel()
+        self._finish_listen(skipped=True)
 
-            self.current_length = song["length"] or 0
-            self.play_start_time = time.time()
+        # Show the new track right away; the worker confirms or reports failure
+        self.is_paused = False
+        self.play_pause_btn.config(text="⏸  Pause")
+        self.current_length = song["length"] or 0
+        self.play_start_time = time.time()
+        self.position_offset = start
+        self._update_details_panel(now_playing=True)
+
+        self._select_tree_row(index)
+
+        self._submit_playback(lambda: self._output_play(song, start=start), song, new_track=True)
+
+    def _submit_playback(self, command, song, new_track=False):
+        """Queue a load/seek on the audio worker; only the newest one runs"""
+        self.play_token += 1
+        token = self.play_token
+        self.play_pending = token
+        self.audio_worker.submit(
+            command,
+            key="transport",
+            on_done=lambda error: self.root.after(
+                0, self._on_playback_confirmed, token, song, error, new_track)
+        )
 
-            self._update_details_panel(now_playing=True)
+    def _on_playback_confirmed(self, token, song, error, new_track=False):
+        if token != self.play_pending:
+            return  # superseded by a newer command
+        self.play_pending = None
+        self.play_start_time = time.time()
 
-            tree_items = self.tree.get_children()
-            if 0 <= index < len(tree_items):
-                self.tree.selection_set(tree_items[index])
-                self.tree.focus(tree_items[index])
-                self.tree.see(tree_items[index])
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to play song:\n{song['title']}\n\n{e}")
+        if error is not None:
+            print(f"Playback error: {error}")
+            self.playing_index = None
+            self.is_paused = False
+            self.play_pause_btn.config(text="▶  Play")
+            self.now_playing_label.config(text=f"⚠ Failed to play: {song['title']}")
+            return
+
+        # Listens start only for tracks the worker actually loaded, so
+        # coalesced next/next/next presses leave no history behind
+        if new_track:
+            self._begin_listen(song)
+
+        if not self.is_paused:
+            self._prepare_crossfade()
+        self._prefetch_upcoming()
+        self._schedule_save()
 
     def play_pause(self):
         if not self.songs:
             return
 
-        if pygame.mixer.music.get_busy() and not self.is_paused:
-            pygame.mixer.music.pause()
+        playing = (self.play_pending is not None or self._output_busy()) and not self.is_paused
+
+        if self.crossfader.active:
+            # Pausing mid-overlap keeps the incoming track where it had got to;
+            # the pause is queued behind the hand-off
+            self.crossfader.finish_now()
+            playing = True
+        elif playing:
+            self.crossfader.cancel()
+
+        if playing:
+            self.audio_worker.submit(self._output_pause)
+            self._pause_listen()
             self.is_paused = True
             self.play_pause_btn.config(text="▶  Resume")
+            self._schedule_save()
         else:
             if self.is_paused:
-                pygame.mixer.music.unpause()
+                self.audio_worker.submit(self._output_unpause)
+                self._resume_listen()
                 self.is_paused = False
                 self.play_pause_btn.config(text="⏸  Pause")
+                self._prepare_crossfade()
+                self._schedule_save()
             else:
                 self.play_selected_song()
 
     def play_next(self):
         if not self.songs:
             return
-        if self.current_index is None:
+        index = self.playing_index if self.playing_index is not None else self.current_index
+        if index is None:
             self.current_index = 0
         else:
-            self.current_index = (self.current_index + 1) % len(self.songs)
+            self.current_index = (index + 1) % len(self.songs)
         self._play_song_at_index(self.current_index)
 
     def play_previous(self):
         if not self.songs:
             return
-        if self.current_index is None:
+        index = self.playing_index if self.playing_index is not None else self.current_index
+        if index is None:
             self.current_index = 0
         else:
-            self.current_index = (self.current_index - 1) % len(self.songs)
+            self.current_index = (index - 1) % len(self.songs)
         self._play_song_at_index(self.current_index)
 
     def stop(self):
         self.manual_stop = True
-        pygame.mixer.music.stop()
+        self.crossfader.cancel()
+        self._finish_listen(skipped=True)
+        self.play_pending = None
+        self.playing_index = None
+        self.audio_worker.submit(self._output_stop, key="transport")
         self.is_paused = False
         self.play_pause_btn.config(text="▶  Play")
 
         self.progress_scale.set(0)
         self.time_label.config(text="00:00 / 00:00")
+        self._schedule_save()
 
     def toggle_mute(self):
         if self.is_muted:
             vol = self.volume_scale.get() / 100.0
-            pygame.mixer.music.set_volume(vol)
+            self.audio_worker.submit(lambda: self._output_set_volume(vol), key="volume")
             self.is_muted = False
             self.mute_btn.config(text="🔊")
         else:
-            pygame.mixer.music.set_volume(0.0)
+            self.audio_worker.submit(lambda: self._output_set_volume(0.0), key="volume")
             self.is_muted = True
             self.mute_btn.config(text="🔇")
 
     def on_volume_change(self, value):
         if not self.is_muted:
             vol = float(value) / 100.0
-            pygame.mixer.music.set_volume(vol)
+            self.audio_worker.submit(lambda: self._output_set_volume(vol), key="volume")
+        self._schedule_save()
+
+    # ---------- Crossfade ----------
+
+    def on_crossfade_change(self, value):
+        seconds = int(round(float(value)))
+        self.crossfade_label.config(text=f"Crossfade: {seconds}s" if seconds else "Crossfade: off")
+        # Apply once the slider settles so a drag does not re-decode per step
+        if self.crossfade_after_id is not None:
+            self.root.after_cancel(self.crossfade_after_id)
+        self.crossfade_after_id = self.root.after(CROSSFADE_APPLY_DELAY_MS, self._apply_crossfade, seconds)
+
+    def _apply_crossfade(self, seconds):
+        self.crossfade_after_id = None
+        if seconds != self.crossfader.seconds:
+            self.crossfader.set_seconds(seconds)
+            if self._output_busy() and not self.is_paused:
+                self._prepare_crossfade()
+            self._schedule_save()
+
+    def _prepare_crossfade(self):
+        """Decode the overlap with the next track in the background"""
+        if not self.crossfader.enabled or not self.songs or self.playing_index is None:
+            return
+        next_index = (self.playing_index + 1) % len(self.songs)
+        self.crossfader.prepare(self.songs[self.playing_index], next_index, self.songs[next_index])
+
+    def _on_crossfade_start(self, index):
+        """Overlap started: show the incoming track as now playing"""
+        if not self.songs:
+            return
+        self.current_index = index % len(self.songs)
+        self.playing_index = self.current_index
+        self.current_length = self.songs[self.current_index]["length"] or 0
+        self._finish_listen(skipped=False)
+        self._begin_listen(self.songs[self.current_index])
+        self._update_details_panel(now_playing=True)
+
+        self._select_tree_row(self.current_index)
+
+    def _on_crossfade_complete(self, index, offset):
+        """Overlap finished: the incoming track now plays on the music stream"""
+        self.position_offset = offset
+        self.play_start_time = time.time()
+        if not self.is_paused:
+            self._prepare_crossfade()
+        self._schedule_save()
+        if self.songs and self.current_index is not None:
+            self.audio_cache.prefetch(self.songs[self.current_index]["path"])
+            self._prefetch_upcoming()
+
+    # ---------- Play history ----------
+
+    def _begin_listen(self, song):
+        self.listen = {
+            "id": song["id"],
+            "start": time.time(),
+            "played": 0.0,
+            "resumed": None if self.is_paused else time.perf_counter()
+        }
+
+    def _pause_listen(self):
+        if self.listen and self.listen["resumed"] is not None:
+            self.listen["played"] += time.perf_counter() - self.listen["resumed"]
+            self.listen["resumed"] = None
+
+    def _resume_listen(self):
+        if self.listen and self.listen["resumed"] is None:
+            self.listen["resumed"] = time.perf_counter()
+
+    def _finish_listen(self, skipped):
+        """Log the current listen; `skipped` means the user moved on early"""
+        if not self.listen:
+            return
+        self._pause_listen()
+        self.history.record(self.listen["id"], self.listen["start"], self.listen["played"], skipped)
+        self.listen = None
+        if self.view_var.get() != PLAYLIST_VIEWS[0]:
+            self._refresh_playlist_view()
+
+    # ---------- Audio output ----------
+
+    def _output_play(self, song, start=0.0):
+        """Start song at `start` seconds, from the decoded cache when possible"""
+        began = time.perf_counter()
+        sound = self.audio_cache.get(song["path"])
+        if sound is not None:
+            pygame.mixer.music.stop()
+            if start > 0:
+                sound = AudioCache.slice_from(sound, start)
+            self.output_channel.play(sound)
+            self.output_channel.set_volume(self.current_volume)
+            self.channel_active = True
+            self.channel_started = time.perf_counter()
+            self.channel_paused_at = None
+        else:
+            self.output_channel.stop()
+            self.channel_active = False
+            pygame.mixer.music.load(song["path"])
+            pygame.mixer.music.play(start=start)
+            pygame.mixer.music.set_volume(self.current_volume)
+            # Decode in the background so replays and seeks hit the cache
+            self.audio_cache.prefetch(song["path"])
+        self.last_start_ms = (time.perf_counter() - began) * 1000
+        if sound is None:
+            self.prefetcher.record_start(song["path"], self.last_start_ms)
+        else:
+            # A seek copies the remaining samples, so it is timed separately
+            self.audio_cache.record_start("seek" if start > 0 else "restart", self.last_start_ms)
+
+    def _prefetch_upcoming(self):
+        """Warm caches for the tracks that will play after the current one"""
+        index = self.playing_index if self.playing_index is not None else self.current_index
+        if not self.songs or index is None:
+            return
+        count = len(self.songs)
+        upcoming = [self.songs[(index + i) % count]["path"]
+                    for i in range(1, min(count, self.prefetcher.depth + 1))]
+        self.prefetcher.schedule(upcoming)
+        self.audio_cache.prefetch(self.songs[(index + 1) % count]["path"])
+
+    def _output_pause(self):
+        if self.channel_active:
+            self.output_channel.pause()
+            self.channel_paused_at = time.perf_counter()
+        else:
+            pygame.mixer.music.pause()
+
+    def _output_unpause(self):
+        if self.channel_active:
+            self.output_channel.unpause()
+            if self.channel_paused_at is not None:
+                self.channel_started += time.perf_counter() - self.channel_paused_at
+                self.channel_paused_at = None
+        else:
+            pygame.mixer.music.unpause()
+
+    def _output_stop(self):
+        self.output_channel.stop()
+        self.channel_active = False
+        pygame.mixer.music.stop()
+
+    def _output_busy(self):
+        if self.channel_active:
+            return self.output_channel.get_busy()
+        return pygame.mixer.music.get_busy()
+
+    def _output_pos_ms(self):
+        """Milliseconds played since the last start or seek"""
+        if self.channel_active:
+            now = self.channel_paused_at or time.perf_counter()
+            return int((now - self.channel_started) * 1000)
+        return pygame.mixer.music.get_pos()
+
+    def _output_set_volume(self, vol):
+        self.current_volume = vol
+        pygame.mixer.music.set_volume(vol)
+        self.output_channel.set_volume(vol)
 
     # ---------- Progress bar seeking ----------
 
@@ -720,30 +2240,26 @@ class MusicPlayerGUI:
         """Seek to a specific position in the current song"""
         if not self.songs or self.current_index is None:
             return
+        if self.playing_index is None:
+            # Nothing loaded yet: start the selected track at the target
+            self._play_song_at_index(self.current_index, start=target_seconds)
+            return
         
-        song = self.songs[self.current_index]
-        
-        try:
-            # Stop current playback
-            was_playing = pygame.mixer.music.get_busy() and not self.is_paused
-            pygame.mixer.music.stop()
-            
-            # Reload and play from position
-            pygame.mixer.music.load(song["path"])
-            pygame.mixer.music.play(start=target_seconds)
-            
-            # Restore paused state if it was paused
-            if not was_playing and self.is_paused:
-                pygame.mixer.music.pause()
-            else:
-                self.is_paused = False
-                self.play_pause_btn.config(text="⏸  Pause")
-            
-            # Reset start time for accurate position tracking
-            self.play_start_time = time.time()
-            
-        except Exception as e:
-            print(f"Seek error: {e}")
+        song = self.songs[self.playing_index]
+        paused = self.is_paused
+        self.crossfader.cancel()
+
+        def seek():
+            # Reload and play from position (instant when the track is cached)
+            self._output_stop()
+            self._output_play(song, start=target_seconds)
+            if paused:
+                self._output_pause()
+
+        # Reset start time for accurate position tracking
+        self.play_start_time = time.time()
+        self.position_offset = target_seconds
+        self._submit_playback(seek, song)
 
     # ---------- UI helpers ----------
 
@@ -784,21 +2300,53 @@ class MusicPlayerGUI:
         if not self.songs or self.current_index is None:
             return
 
-        if not self.is_paused and not pygame.mixer.music.get_busy():
+        # The music stream is idle while the overlap plays on mixer channels,
+        # and while the worker is still loading a new track or seek target
+        if self.crossfader.active or self.play_pending is not None:
+            return
+
+        if not self.is_paused and not self._output_busy():
             if self.manual_stop:
                 self.manual_stop = False
                 return
 
             if self.play_start_time and (time.time() - self.play_start_time) > 1.0:
                 if self.auto_next_enabled:
+                    self._finish_listen(skipped=False)
                     self.play_next()
             return
 
-        pos_ms = pygame.mixer.music.get_pos()
+        pos_ms = self._output_pos_ms()
         if pos_ms < 0:
             pos_ms = 0
 
-        current_sec = pos_ms // 1000
+        position = self.position_offset + pos_ms / 1000.0
+
+        if self.crossfader.enabled and not self.is_paused:
+            remaining = self.crossfader.seconds_until_start(position)
+            # Hand the exact start over to the crossfade timing thread
+            if remaining is not None and -0.25 < remaining <= 1.0:
+                self.crossfader.arm(remaining)
+
+        # Checkpoint the in-track position so a crash resumes close to here
+        if not self.is_paused and time.time() - self.last_checkpoint >= SESSION_CHECKPOINT_SECONDS:
+            self.last_checkpoint = time.time()
+            self.session_store.save_async(self._session_state())
+
+        self._show_position(position)
+
+    def _current_position(self):
+        """Seconds into the playing track, or the saved position before playback"""
+        if self.playing_index is None:
+            if self.resume_position is not None and self.current_index == self.resume_index:
+                return self.resume_position
+            return 0.0
+        if self.is_paused or self._output_busy():
+            return self.position_offset + max(0, self._output_pos_ms()) / 1000.0
+        return 0.0
+
+    def _show_position(self, position):
+        current_sec = int(position)
         total_sec = int(self.current_length)
 
         if total_sec > 0: